@@ -0,0 +1,326 @@
+"""Helpers shared by the congestion-control experiment scripts:
+   fairness metrics, iperf3/netperf plumbing and the multi-flow
+   dumbbell topology."""
+
+import os
+import re
+import shutil
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from math import fsum
+
+from mininet.topo import Topo
+from mininet.link import TCLink
+from mininet.node import OVSKernelSwitch
+from mininet.nodelib import LinuxBridge
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+# Per-run logs go on tmpfs when available so that disk writeback cannot
+# perturb the flows being measured
+LOG_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else '/tmp'
+
+# Congestion-control algorithms compared by the sweep scripts;
+# reno_custom needs its kernel module (make && insmod reno_custom.ko)
+CC_ALGOS = ['reno', 'cubic', 'reno_custom']
+
+
+class MultiFlowTopology(Topo):
+    """Dumbbell: senders h1..hn on s1, receivers h(n+1)..h(n+m) on s2,
+       joined by a single s1-s2 bottleneck link"""
+
+    def build(self, n=10, m=10, bw=1, delay='100ms', max_queue_size=50,
+              access_bw=10, access_delay='5ms'):
+        """n: number of senders
+           m: number of receivers
+           bw: bottleneck bandwidth (Mbps)
+           delay: bottleneck one-way delay
+           max_queue_size: bottleneck queue limit (packets)
+           access_bw: sender/receiver access link bandwidth (Mbps)
+           access_delay: access link one-way delay"""
+        # hN gets 10.0.0.N/24 at net.start(), so callers need no setIP pass
+        senders = [self.addHost(f'h{i}', ip=f'10.0.0.{i}/24')
+                   for i in range(1, n + 1)]
+        receivers = [self.addHost(f'h{i}', ip=f'10.0.0.{i}/24')
+                     for i in range(n + 1, n + m + 1)]
+
+        # Plain learning bridges are all we need: prefer the in-kernel Linux
+        # bridge (no ovs-vswitchd competing for CPU) when brctl is present
+        if shutil.which('brctl'):
+            sopts = dict(cls=LinuxBridge)
+        else:
+            sopts = dict(cls=OVSKernelSwitch, failMode='standalone')
+        s1 = self.addSwitch('s1', **sopts)
+        s2 = self.addSwitch('s2', **sopts)
+
+        # every access link shares one option dict (addLink copies it)
+        access = dict(cls=TCLink, bw=access_bw, delay=access_delay)
+        for h in senders:
+            self.addLink(h, s1, **access)
+
+        self.addLink(s1, s2, cls=TCLink, bw=bw, delay=delay,
+                     max_queue_size=max_queue_size)
+
+        for h in receivers:
+            self.addLink(s2, h, **access)
+
+
+@lru_cache(maxsize=8)
+def dumbbell(n=10, m=10, bw=1, delay='100ms', max_queue_size=50,
+             access_bw=10, access_delay='5ms'):
+    """Shared MultiFlowTopology for the given parameters; Mininet only
+       reads a Topo while building, so one instance can seed every
+       Mininet(topo=...) of a sweep
+       returns: built MultiFlowTopology (do not modify it)"""
+    return MultiFlowTopology(n=n, m=m, bw=bw, delay=delay,
+                             max_queue_size=max_queue_size,
+                             access_bw=access_bw, access_delay=access_delay)
+
+
+def cmd_all(jobs, max_workers=16):
+    """Run host.cmd(c) for every (host, c) in jobs concurrently; each
+       Node has its own shell, so the prompt round-trips overlap
+       jobs: iterable of (host, command string)
+       returns: list of outputs, in job order"""
+    jobs = list(jobs)
+    if not jobs:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as ex:
+        return list(ex.map(lambda job: job[0].cmd(job[1]), jobs))
+
+
+def set_congestion_control(hosts, cc_algo):
+    """Select TCP congestion control cc_algo on every host concurrently
+       and read the setting back: sysctl fails (on stderr) when the
+       algorithm's module is not loaded, leaving the previous one active
+       returns: True if every host now uses cc_algo"""
+    cmd = (f'sysctl -w net.ipv4.tcp_congestion_control={cc_algo} > /dev/null 2>&1; '
+           'sysctl -n net.ipv4.tcp_congestion_control')
+    return all(out.strip() == cc_algo for out in cmd_all((h, cmd) for h in hosts))
+
+
+def jains(x):
+    """Jain's Fairness Index: (sum x)^2 / (n * sum x^2)
+       x: per-flow throughputs
+       returns: index in (0, 1], or 0.0 for empty/all-zero input"""
+    if np is None:
+        n, s, d = len(x), fsum(x), fsum(v * v for v in x)
+    else:
+        a = np.asarray(x, dtype=np.float64)
+        n, s, d = a.size, a.sum(), a.dot(a)
+    return 0.0 if d == 0 else float((s * s) / (n * d))
+
+
+def summarize(x):
+    """Total, mean, min, max and Jain's index of x from one array
+       x: per-flow throughputs
+       returns: (total, avg, min, max, fairness), all 0.0 if x is empty"""
+    if len(x) == 0:
+        return 0.0, 0.0, 0.0, 0.0, 0.0
+    if np is None:
+        n, s, d = len(x), fsum(x), fsum(v * v for v in x)
+        mn, mx = min(x), max(x)
+    else:
+        a = np.asarray(x, dtype=np.float64)
+        n, s, d = a.size, a.sum(), a.dot(a)
+        mn, mx = a.min(), a.max()
+    fairness = 0.0 if d == 0 else float((s * s) / (n * d))
+    return float(s), float(s / n), float(mn), float(mx), fairness
+
+
+def percentiles(x, qs=(5, 95)):
+    """Percentiles of x with linear interpolation (numpy's default),
+       e.g. p5/p95 to show the tail flows that Jain's index hides
+       x: per-flow values (non-empty)
+       qs: percentiles in [0, 100]
+       returns: tuple of floats, one per entry of qs"""
+    if np is not None:
+        return tuple(float(v) for v in np.percentile(np.asarray(x, dtype=np.float64), qs))
+    a = sorted(x)
+    out = []
+    for q in qs:
+        k = (len(a) - 1) * q / 100.0
+        lo = int(k)
+        hi = min(lo + 1, len(a) - 1)
+        out.append(a[lo] + (a[hi] - a[lo]) * (k - lo))
+    return tuple(float(v) for v in out)
+
+
+def parse_iperf3_json(raw):
+    """Goodput and retransmits from an iperf3 -J report
+       raw: report text (str or bytes)
+       returns: (Mbps, retransmits); receiver-side goodput is used when
+       the report has it, sender-side throughput otherwise"""
+    end = _json.loads(raw)['end']
+    received = end.get('sum_received', {})
+    if received.get('bits_per_second', 0) > 0:
+        bps = received['bits_per_second']
+    else:
+        bps = end['sum_sent']['bits_per_second']
+    return bps / 1e6, end.get('sum_sent', {}).get('retransmits', 0)
+
+
+def read_log(path):
+    """Read a whole log file written by a Mininet host; hosts share the
+       root filesystem, so no shell round-trip is needed
+       returns: file contents as bytes, or b'' if it does not exist"""
+    try:
+        size = os.stat(path).st_size
+    except FileNotFoundError:
+        return b''
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.pread(fd, size, 0)
+    finally:
+        os.close(fd)
+
+
+def wait_json_done(paths, timeout, interval=0.25):
+    """Wait until every iperf3 -J report in paths is complete; iperf3
+       writes the whole report at exit, so a trailing '}' means done
+       returns: True if all reports completed before timeout"""
+    pending = list(paths)
+    deadline = time.monotonic() + timeout
+    while True:
+        pending = [p for p in pending if not _json_done(p)]
+        if not pending:
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
+
+
+def _json_done(path, tail=16):
+    "Does the file at path end (ignoring whitespace) with '}'?"
+    try:
+        size = os.stat(path).st_size
+    except FileNotFoundError:
+        return False
+    if size == 0:
+        return False
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.pread(fd, tail, max(0, size - tail)).rstrip().endswith(b'}')
+    finally:
+        os.close(fd)
+
+
+def wait_port_open(host, port, timeout=2.0, interval=0.05):
+    """Wait until something on host is listening on TCP port
+       returns: True if the port opened before timeout"""
+    deadline = time.monotonic() + timeout
+    while True:
+        if host.cmd(f'ss -Hln sport = :{port}').strip():
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
+
+
+def wait_pids(pids, timeout, interval=0.5):
+    """Wait for processes started on Mininet hosts to exit; hosts share
+       the root PID namespace, so their PIDs can be probed directly
+       pids: PIDs (e.g. Node.lastPid after a '&' command) or Popen
+             objects (from Node.popen()) to wait for
+       timeout: maximum time to wait in seconds
+       returns: True if all exited before timeout"""
+    deadline = time.monotonic() + timeout
+    pending = [pid for pid in pids if pid]
+    while True:
+        pending = [pid for pid in pending if _alive(pid)]
+        if not pending:
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
+
+
+def _alive(pid):
+    "Is process pid (or Popen object) still running?"
+    if hasattr(pid, 'poll'):
+        # our own child: poll() also reaps it, so it cannot linger as a zombie
+        return pid.poll() is None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def pin_cpu(pid, k):
+    """Pin process pid (or Popen object) to CPU k modulo the CPUs this
+       driver may use; hosts share the root PID namespace, so PIDs of
+       processes started on them are valid here
+       returns: the CPU chosen, or None if the process already exited"""
+    pid = getattr(pid, 'pid', pid)
+    cpus = sorted(os.sched_getaffinity(0))
+    cpu = cpus[k % len(cpus)]
+    try:
+        os.sched_setaffinity(pid, {cpu})
+    except ProcessLookupError:
+        return None
+    return cpu
+
+
+def start_bg(host, cmd):
+    """Run cmd in the background on host; Node.cmd() records the $! of
+       a trailing '&' as lastPid, so only that process is killed later
+       returns: PID of the started process (None if it was not reported)"""
+    host.cmd(f'{cmd} &')
+    return host.lastPid
+
+
+def kill_pids(pids, sig=signal.SIGTERM):
+    """Signal processes started with start_bg(); hosts share the root
+       PID namespace, so the driver can signal them directly
+       pids: PIDs (None entries are skipped)
+       sig: signal to send"""
+    for pid in pids:
+        if pid:
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
+
+
+def tcp_rr_latency(host, ip, seconds=3):
+    """Mean TCP request/response latency from host to ip using netperf
+       TCP_RR (netserver must be running on ip)
+       host: Mininet host to run netperf on
+       ip: destination IP address
+       seconds: test length
+       returns: latency in ms, or None if netperf failed"""
+    out = host.cmd(f'netperf -H {ip} -t TCP_RR -l {seconds} -P 0 '
+                   '-- -O mean_latency 2>/dev/null')
+    try:
+        # mean_latency is reported in microseconds
+        return float(out.split()[-1]) / 1000.0
+    except (IndexError, ValueError):
+        return None
+
+
+# avg field of ping's 'rtt min/avg/max/mdev = a/b/c/d ms' summary
+_PING_AVG_RE = re.compile(r'min/avg/max[^=]*=\s*[\d.]+/([\d.]+)/', re.ASCII)
+
+
+def latency_ms(host, ip, seconds=10, count=10):
+    """Mean latency from host to ip: netperf TCP_RR when netserver is
+       reachable, otherwise the average RTT of count pings
+       returns: latency in ms, or 0.0 if neither could be measured"""
+    latency = tcp_rr_latency(host, ip, seconds=seconds)
+    if latency is not None:
+        return latency
+    m = _PING_AVG_RE.search(host.cmd(f'ping -c {count} -q {ip}'))
+    return float(m.group(1)) if m else 0.0
@@ -4,12 +4,19 @@
 from mininet.link import TCLink
 from mininet.log import setLogLevel, info
 from mininet.cli import CLI
+import os
+import signal
 import time
 import re
 
+from common import summarize, start_bg, kill_pids, latency_ms
+
 # 병목 링크 대역폭 설정 (계산에 사용하기 위해 상수로 정의)
 BOTTLENECK_BW = 20
 
+# iperf 결과 파싱용 정규식
+MBPS_RE = re.compile(rb'([\d\.]+)\s+Mbits/sec')
+
 class RTTUnfairnessTopo(Topo):
     def build(self):
         # 수신자 (Server)
@@ -21,23 +28,30 @@ def build(self):
         self.addLink(receiver, s1, cls=TCLink, bw=BOTTLENECK_BW, max_queue_size=150)
 
         # [그룹 A: 빠른 녀석들] h1~h3 (RTT ~10ms)
+        fast_opts = dict(cls=TCLink, bw=100, delay='5ms')
         for i in range(1, 4):
             sender = self.addHost(f'h{i}')
-            self.addLink(sender, s1, cls=TCLink, bw=100, delay='5ms')
+            self.addLink(sender, s1, **fast_opts)
         
         # [그룹 B: 느린 녀석들] h4~h6 (RTT ~200ms)
+        slow_opts = dict(cls=TCLink, bw=100, delay='100ms')
         for i in range(4, 7):
             sender = self.addHost(f'h{i}')
-            self.addLink(sender, s1, cls=TCLink, bw=100, delay='100ms')
+            self.addLink(sender, s1, **slow_opts)
 
-def calculate_jains_index(throughputs):
-    """ Jain's Fairness Index 계산 """
-    n = len(throughputs)
-    if n == 0: return 0.0
-    sum_x = sum(throughputs)
-    sum_x_sq = sum([x**2 for x in throughputs])
-    if sum_x_sq == 0: return 0.0
-    return (sum_x ** 2) / (n * sum_x_sq)
+def last_mbps(path, tail=4096):
+    """ 결과 파일 끝부분(tail 바이트)만 읽어 마지막 줄(전체 구간 요약)의 'N Mbits/sec' 값 반환
+        (요약 줄이 없으면 앞선 10초 구간 값을 대신 쓰지 않고 0.0) """
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - tail))
+            buf = f.read()
+    except FileNotFoundError:
+        return 0.0
+    lines = buf.rstrip().rsplit(b'\n', 1)
+    match = MBPS_RE.search(lines[-1])
+    return float(match.group(1)) if match else 0.0
 
 def main():
     topo = RTTUnfairnessTopo()
@@ -47,41 +61,33 @@ def main():
     h_recv = net.get('h_recv')
     h1 = net.get('h1') # Latency 측정용 (Fast Group 대표)
     senders = [net.get(f'h{i}') for i in range(1, 7)]
+    recv_ip = h_recv.IP()
 
     info("=== 1. Starting iperf Server ===\n")
-    h_recv.cmd('iperf -s &')
+    server_pids = [start_bg(h_recv, 'iperf -s'),
+                   start_bg(h_recv, 'netserver -D > /dev/null 2>&1')]
 
     info("=== 2. Starting 6 TCP Flows (Generating Congestion) ===\n")
     # 모든 호스트가 동시에 전송 시작 (40초간)
+    # -f m: 단위 고정 (기본은 자동 단위라 굶은 플로우의 요약이 Kbits/sec로 찍힐 수 있음)
     for sender in senders:
-        sender.cmd(f'iperf -c {h_recv.IP()} -t 40 -i 10 > {sender.name}_result.txt &')
+        sender.cmd(f'iperf -c {recv_ip} -t 40 -i 10 -f m > {sender.name}_result.txt &')
 
     info("=== Test Running... Waiting for congestion to build up (10s) ===\n")
     time.sleep(10)
 
     # [추가됨] Latency 측정
     info("=== 3. Measuring Latency (RTT) under Load ===\n")
-    # 혼잡한 상황에서 h1이 h_recv에게 핑을 보냄
-    ping_out = h1.cmd(f'ping -c 10 {h_recv.IP()}')
-    
-    # Ping 결과 파싱
-    rtt_avg = 0.0
-    try:
-        # rtt min/avg/max/mdev = 20.1/25.2/30.5/1.2 ms 형태 파싱
-        rtt_line = ping_out.splitlines()[-1]
-        match = re.search(r'([\d\.]+)/([\d\.]+)/([\d\.]+)/([\d\.]+)', rtt_line)
-        if match:
-            rtt_avg = float(match.group(2)) # avg 값 추출
-        info(f"Ping Output: {rtt_line}\n")
-    except Exception as e:
-        info(f"Ping Parse Error: {e}\n")
+    # 혼잡한 상황에서 h1 -> h_recv TCP_RR 지연 측정 (iperf 플로우와 같은 큐를 거침)
+    # (netperf 사용 불가 시 ping 평균 RTT로 대체)
+    rtt_avg = latency_ms(h1, recv_ip, seconds=10)
+    info(f"Mean latency under load: {rtt_avg:.2f} ms\n")
 
     info("=== Waiting for test to finish (Remaining time) ===\n")
     time.sleep(25) # 남은 시간 대기
 
     info("=== 4. Collecting Results ===\n")
     
-    total_bw = 0
     throughput_list = []
 
     print(f"{'Host':<10} {'RTT Group':<15} {'Throughput (Mbps)':<20}")
@@ -89,16 +95,10 @@ def main():
 
     for i, sender in enumerate(senders):
         try:
-            # iperf 결과 파일 파싱
-            last_line = sender.cmd(f'tail -n 1 {sender.name}_result.txt').strip()
-            match = re.search(r'([\d\.]+)\s+Mbits/sec', last_line)
-            if match:
-                bw = float(match.group(1))
-            else:
-                bw = 0.0
+            # iperf 결과 파일 파싱 (호스트들은 작업 디렉토리를 공유하므로 셸을 거치지 않고 직접 읽음)
+            bw = last_mbps(f'{sender.name}_result.txt')
             
             throughput_list.append(bw)
-            total_bw += bw
             
             group_str = "Fast (10ms)" if i < 3 else "Slow (200ms)"
             print(f"{sender.name:<10} {group_str:<15} {bw:.2f}")
@@ -109,8 +109,10 @@ def main():
 
     print("-" * 45)
 
-    # [분석 1] Fairness (공정성)
-    j_index = calculate_jains_index(throughput_list)
+    # 합계와 Jain 지수를 한 배열에서 한 번에 (numpy가 있으면 벡터 연산)
+    total_bw, _, _, _, j_index = summarize(throughput_list)
+
+    # [분석 1] Fairness (공정성) - 위에서 계산한 j_index 사용
 
     # [분석 2] Link Utilization (링크 효율)
     # 총 처리량 / 병목 대역폭 * 100
@@ -136,7 +138,7 @@ def main():
     print("=========================================")
 
     # Clean up
-    h_recv.cmd('killall -9 iperf')
+    kill_pids(server_pids, signal.SIGKILL)
     net.stop()
 
 if __name__ == '__main__':
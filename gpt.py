@@ -1,110 +1,114 @@
 #!/usr/bin/env python3
 # 6-flow MSS 편향 실험: Reno의 MSS-bias로 인한 공정성 저하/지연 증가 관측
 from mininet.net import Mininet
-from mininet.topo import Topo
 from mininet.link import TCLink
-from mininet.node import OVSKernelSwitch
-from mininet.log import setLogLevel
-import time, json
+from mininet.log import setLogLevel, warn
+import os, re
+from subprocess import PIPE, STDOUT
+
+from common import (LOG_DIR, dumbbell, summarize, percentiles,
+                    parse_iperf3_json, read_log, wait_port_open, wait_pids,
+                    pin_cpu, cmd_all)
 
 BOTTLENECK_Mbps = 2.0      # s1-s2 용량
 ONEWAY_DELAY = '50ms'      # 편도 지연(왕복 ~100ms)
 DURATION = 30              # 초
 
-class MssBiasTopo(Topo):
-    def build(self):
-        for i in range(1, 8):
-            self.addHost(f'h{i}')
-        s1 = self.addSwitch('s1', cls=OVSKernelSwitch, failMode='standalone')
-        s2 = self.addSwitch('s2', cls=OVSKernelSwitch, failMode='standalone')
-        for i in range(1, 7):
-            self.addLink(f'h{i}', s1, cls=TCLink, bw=50, delay='5ms')
-        self.addLink(s2, 'h7', cls=TCLink, bw=50, delay='5ms')
-        self.addLink(s1, s2, cls=TCLink, bw=BOTTLENECK_Mbps, delay=ONEWAY_DELAY, max_queue_size=50)
-
-def wait_nonempty(host, path, timeout=5.0, interval=0.1):
-    waited = 0.0
-    while waited < timeout:
-        size_str = host.cmd(f'stat -c %s {path} 2>/dev/null').strip()
-        try: size = int(size_str)
-        except: size = 0
-        if size > 0: return True, size
-        time.sleep(interval); waited += interval
-    return False, 0
+# ping 요약 줄에서 avg RTT (bytes 로그를 한 번에 검색)
+RTT_RE = re.compile(rb'rtt min/avg/max[^=]*=\s*[\d.]+/([\d.]+)/')
 
 def measure(cc_algo='reno', duration=DURATION):
-    topo = MssBiasTopo()
+    # h1~h6 송신 -> s1 == 병목 == s2 -> h7 수신
+    topo = dumbbell(n=6, m=1, bw=BOTTLENECK_Mbps, delay=ONEWAY_DELAY,
+                    max_queue_size=50, access_bw=50)
     net  = Mininet(topo=topo, link=TCLink, autoSetMacs=True)
     net.start()
 
-    # IP
-    for i in range(1, 8):
-        h = net.get(f'h{i}')
-        h.setIP(f'10.0.0.{i}/24', intf=f'h{i}-eth0')
-
-    # CC
-    for i in range(1, 8):
-        net.get(f'h{i}').cmd(f'sysctl -w net.ipv4.tcp_congestion_control={cc_algo} > /dev/null')
+    hosts = [net.get(f'h{i}') for i in range(1, 8)]
+    senders, receiver = hosts[:6], hosts[6]
 
-    # MSS 편향 유도: h1~h3 MTU 1500(기본), h4~h6 MTU 600
-    for i in range(4, 7):
-        net.get(f'h{i}').cmd('ip link set dev h%d-eth0 mtu 600' % i)
+    # CC + MSS 편향 유도(h1~h3 MTU 1500(기본), h4~h6 MTU 600): 호스트당 셸 호출 1회, 동시에
+    set_cc = f'sysctl -w net.ipv4.tcp_congestion_control={cc_algo} > /dev/null'
+    # ';'로 연결: sysctl이 실패해도 MTU 변경(MSS 편향 유도)은 반드시 적용
+    cmd_all((h, f'{set_cc}; ip link set dev h{i}-eth0 mtu 600' if 4 <= i <= 6 else set_cc)
+            for i, h in enumerate(hosts, start=1))
 
-    # iperf3 서버(하나의 호스트 h7, 서로 다른 포트)
+    # iperf3 서버(하나의 호스트 h7, 서로 다른 포트), 서버마다 다른 코어에 고정
+    # (pin_cpu는 이 프로세스가 쓸 수 있는 코어 중에서 고름 -> cpuset 제한 환경에서도 동작)
     ports = [5201, 5202, 5203, 5204, 5205, 5206]
-    for p in ports:
-        net.get('h7').cmd(f'iperf3 -s -p {p} -1 -J > /tmp/s{p}.json 2>&1 &')
-
-    time.sleep(2)
-
-    # 클라이언트 시작
-    for i, p in enumerate(ports, start=1):
-        net.get(f'h{i}').cmd(f'iperf3 -c 10.0.0.7 -p {p} -t {duration} -i 1 -J > /tmp/c{i}.json 2>&1 &')
+    # -J 보고서는 파일 대신 서버 stdout 파이프로 바로 받음 (-1 -i 0: 종료 시 수 KB 한 번 출력)
+    servers = []
+    for k, p in enumerate(ports):
+        servers.append(receiver.popen(['iperf3', '-s', '-p', str(p), '-1', '-i', '0', '-J'],
+                                      stdout=PIPE, stderr=STDOUT))
+        pin_cpu(servers[-1], k)
 
-    # RTT 측정
-    for i in range(1, 7):
-        net.get(f'h{i}').cmd(f'ping -c 20 -i 1.5 10.0.0.7 > /tmp/p{i}.txt 2>&1 &')
-
-    time.sleep(duration + 5)
+    for p in ports:
+        if not wait_port_open(receiver, p):
+            warn(f'*** iperf3 server on port {p} is not listening; '
+                 'flow may fail to connect\n')
+
+    # 클라이언트는 popen으로 바로 실행하고 서버와 같은 방식(pin_cpu)으로 코어 고정:
+    # 서버들이 쓴 코어 다음 번호부터 (코어가 충분하면 서버와 겹치지 않음)
+    # (요약 JSON은 서버 측에서 수집; -i 0: 쓰지 않는 초당 구간 보고 생략)
+    clients = []
+    for i, (h, p) in enumerate(zip(senders, ports), start=1):
+        with open(f'{LOG_DIR}/c{i}.log', 'wb') as f:
+            clients.append(h.popen(['iperf3', '-c', '10.0.0.7', '-p', str(p), '-t', str(duration),
+                                    '-i', '0', '-f', 'm'],
+                                   stdout=f, stderr=STDOUT))
+        pin_cpu(clients[-1], len(ports) + i - 1)
+
+    # RTT 측정 (송신자당 셸 호출 1회, lastPid = ping PID)
+    ping_pids = []
+    for i, h in enumerate(senders, start=1):
+        h.cmd(f'ping -c 20 -i 1.5 -q 10.0.0.7 > {LOG_DIR}/p{i}.txt 2>&1 &')
+        ping_pids.append(h.lastPid)
+
+    # 고정 sleep 대신 서버(-1: 테스트 하나 후 종료)와 ping이 모두 끝나는 즉시 수집
+    if not wait_pids(servers, timeout=duration + 10):
+        warn('*** some iperf3 servers are still running; collecting anyway\n')
+    wait_pids([pid for pid in ping_pids if pid], timeout=5)
 
     # 서버 JSON sum_received 기반 goodput 수집
     tputs = []
-    for p in ports:
-        ok, size = wait_nonempty(net.get('h7'), f'/tmp/s{p}.json', timeout=5.0)
-        out = net.get('h7').cmd(f'cat /tmp/s{p}.json')
+    for p, srv in zip(ports, servers):
         try:
-            data = json.loads(out)
-            bps = data['end']['sum_received']['bits_per_second']
-            tputs.append(bps / 1e6)
+            out, _ = srv.communicate(timeout=1)
+            mbps, _ = parse_iperf3_json(out)
+            tputs.append(mbps)
         except Exception as e:
-            print(f'parse fail port {p}: {e} (size={size})')
+            print(f'parse fail port {p}: {e}')
+
+    # 끝나지 않은 서버/클라이언트(연결 실패 등) 정리
+    for proc in servers + clients:
+        if proc.poll() is None:
+            proc.terminate()
+            proc.wait()
 
     # RTT 파싱
     rtts = []
     for i in range(1, 7):
-        out = net.get(f'h{i}').cmd(f'grep "rtt min/avg/max" /tmp/p{i}.txt || true')
-        if '=' in out:
-            try:
-                parts = out.split('=')[1].split('/')
-                rtts.append(float(parts[1].strip().split()[0]))
-            except: pass
+        m = RTT_RE.search(read_log(f'{LOG_DIR}/p{i}.txt'))
+        if m:
+            rtts.append(float(m.group(1)))
 
     net.stop()
+    # tmpfs(/dev/shm)는 메모리를 차지하므로 로그 정리
+    os.system(f'rm -f {LOG_DIR}/c[1-6].log {LOG_DIR}/p[1-6].txt')
 
     # 메트릭
     res = {'cc': cc_algo}
     if tputs:
-        total = sum(tputs)
-        n = len(tputs)
-        s = sum(tputs)
-        sq = sum(x*x for x in tputs)
+        total, avg, mn, mx, fi = summarize(tputs)
         res['utilization'] = (total / BOTTLENECK_Mbps) * 100.0   
-        res['fairness']    = (s*s)/(n*sq) if sq>0 else 0.0      
+        res['fairness']    = fi
         res['throughputs'] = tputs
-        res['avg_tput']    = total/n
-        res['min_tput']    = min(tputs); res['max_tput']=max(tputs)
+        res['avg_tput']    = avg
+        res['min_tput']    = mn; res['max_tput']=mx
+        res['p5_tput'], res['p95_tput'] = percentiles(tputs)
     if rtts:
-        res['rtt_avg']=sum(rtts)/len(rtts); res['rtt_min']=min(rtts); res['rtt_max']=max(rtts)
+        _, res['rtt_avg'], res['rtt_min'], res['rtt_max'], _ = summarize(rtts)
     return res
 
 if __name__ == '__main__':
@@ -119,6 +123,7 @@ def measure(cc_algo='reno', duration=DURATION):
     print(f"Fairness (Jain): {R.get('fairness',0):.4f}")
     print(f"평균 Throughput: {R.get('avg_tput',0):.4f} Mbps")
     print(f"Throughput 범위: {R.get('min_tput',0):.4f} ~ {R.get('max_tput',0):.4f} Mbps")
+    print(f"Throughput p5~p95: {R.get('p5_tput',0):.4f} ~ {R.get('p95_tput',0):.4f} Mbps")
     print(f"평균 RTT: {R.get('rtt_avg',0):.1f} ms "
           f"(min {R.get('rtt_min',0):.1f}, max {R.get('rtt_max',0):.1f})")
     print('\n개별 throughput (Mbps):')
@@ -3,47 +3,72 @@
 from mininet.node import OVSKernelSwitch
 from mininet.cli import CLI
 from mininet.node import Host
-from mininet.log import setLogLevel, info
+from mininet.log import setLogLevel, info, warn
 from mininet.link import TCLink
 import time
-import numpy as np
+
+from common import jains, read_log, start_bg, kill_pids, latency_ms
+
+NETEM_SEED = 42  # netem 난수 시드 (재정렬 패턴 고정)
 
 class ReorderTopo(Topo):
     def build(self):
         switch = self.addSwitch('s1')
         server = self.addHost('server', ip='10.0.0.1/24')
-        self.addLink(server, switch, cls=TCLink, bw=10, delay='50ms')  # 기본, reordering은 netem으로
+        link_opts = dict(cls=TCLink, bw=10, delay='50ms')
+        self.addLink(server, switch, **link_opts)  # 기본, reordering은 netem으로
         for i in range(2, 8):  # 6 clients
             client = self.addHost(f'client{i-1}', ip=f'10.0.0.{i}/24')
-            self.addLink(client, switch, cls=TCLink, bw=10, delay='50ms')
+            self.addLink(client, switch, **link_opts)
 
 def measure_reorder_performance(net):
     # Reordering 시뮬: 클라이언트 인터페이스에 netem 적용
+    # TCLink가 이미 root(htb 5:) 아래에 netem(10:)을 설치하므로 add가 아닌 change로
+    # 기존 netem에 reorder를 추가 (reorder는 delay가 있어야 동작)
+    # seed 고정: 매 실행 같은 재정렬 패턴 -> 짧은 실행에서도 결과 재현 가능
+    # (seed는 최신 iproute2만 지원하므로 실패하면 seed 없이 재시도)
+    netem = 'netem delay 50ms reorder 10% 50%'  # 10% 재정렬, 50% 상관
     for i in range(1, 7):
         client = net.get(f'client{i}')
-        client.cmd('tc qdisc add dev client{i}-eth0 root netem reorder 10% 50%')  # 10% 재정렬, 50% 상관
+        intf = f'client{i}-eth0'
+        change = f'tc qdisc change dev {intf} parent 5:1 handle 10: {netem}'
+        client.cmd(f'{change} seed {NETEM_SEED} 2>/dev/null || {change}')
+        if 'reorder' not in client.cmd(f'tc qdisc show dev {intf}'):
+            warn(f'*** netem reorder was not applied on {intf}\n')
     
     server = net.get('server')
-    server.cmd('iperf -s &')
-    
-    clients = [net.get(f'client{i}') for i in range(1, 7)]
-    throughputs = []
-    for client in clients:
-        result = client.cmd('iperf -c 10.0.0.1 -t 30')
-        lines = result.split('\n')
-        throughput_line = [line for line in lines if 'sec' in line][-1]
-        throughput = float(throughput_line.split()[-2]) / 1e6 if throughput_line else 0  # Mbps
-        throughputs.append(throughput)
-    
-    total_throughput = sum(throughputs)
-    utilization = total_throughput / 10.0  # Mbps (of 10Mbps link)
-    
-    n = len(throughputs)
-    jain = (np.sum(throughputs)**2) / (n * np.sum(np.square(throughputs))) if np.sum(throughputs) > 0 else 0
-    
-    ping_result = clients[0].cmd('ping -c 10 10.0.0.1')
-    latency_avg = float(ping_result.split('/')[-3]) if 'rtt' in ping_result else 0
+    server_pids = [start_bg(server, 'iperf -s'),
+                   start_bg(server, 'netserver -D > /dev/null 2>&1')]
     
+    try:
+        clients = [net.get(f'client{i}') for i in range(1, 7)]
+        # 모든 플로우를 동시에 시작해야 병목 경쟁이 생김 (순차 실행 시 공정성 측정 무의미)
+        # -f m: 단위를 Mbits/sec로 고정 (기본은 자동 단위)
+        duration = 30
+        for i, client in enumerate(clients, start=1):
+            client.cmd(f'iperf -c 10.0.0.1 -t {duration} -f m > /tmp/iperf_c{i}.txt 2>&1 &')
+        time.sleep(duration + 3)
+
+        throughputs = []
+        for i, client in enumerate(clients, start=1):
+            # 호스트는 /tmp를 공유하므로 셸 왕복(cat) 없이 드라이버에서 직접 읽음
+            result = read_log(f'/tmp/iperf_c{i}.txt').decode(errors='replace')
+            lines = [line for line in result.split('\n') if 'Mbits/sec' in line]
+            # 연결 실패 등으로 결과 줄이 없으면 0 (마지막 줄 = 전체 구간 요약, 이미 Mbps)
+            throughput = float(lines[-1].split()[-2]) if lines else 0.0
+            throughputs.append(throughput)
+        
+        total_throughput = sum(throughputs)
+        utilization = total_throughput / 10.0  # Mbps (of 10Mbps link)
+        
+        jain = jains(throughputs)
+        
+        # netperf 사용 불가 시 ping 평균 RTT로 대체
+        latency_avg = latency_ms(clients[0], '10.0.0.1', seconds=10)
+    finally:
+        # 측정 중 예외가 나도 서버 프로세스는 반드시 정리
+        kill_pids(server_pids)
+
     info(f"Utilization: {utilization:.2f} (of 10Mbps), Fairness: {jain:.2f}, Latency: {latency_avg:.2f} ms\n")
     return utilization, jain, latency_avg
 
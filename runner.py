@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# 여러 혼잡제어 알고리즘을 하나의 Mininet 네트워크에서 연속 측정
+# (알고리즘마다 net.start()/net.stop()을 반복하지 않음)
+from mininet.net import Mininet
+from mininet.link import TCLink
+from mininet.log import setLogLevel, info, warn
+
+from common import (CC_ALGOS, dumbbell, summarize, parse_iperf3_json,
+                    read_log, wait_port_open, wait_json_done,
+                    set_congestion_control, start_bg, kill_pids)
+
+N_FLOWS = 10
+BOTTLENECK_Mbps = 1.0
+DURATION = 30
+
+def start_servers(net, n=N_FLOWS):
+    """ 수신자마다 iperf3 서버를 한 번만 띄워 모든 알고리즘 측정에서 재사용
+        (-1 없이 상주) -> 종료할 때 죽일 PID 목록 반환 """
+    receivers = [net.get(f'h{i}') for i in range(n + 1, 2 * n + 1)]
+    ports = [5200 + i for i in range(1, n + 1)]
+    pids = [start_bg(r, f'iperf3 -s -p {p} > /dev/null 2>&1')
+            for r, p in zip(receivers, ports)]
+    for r, p in zip(receivers, ports):
+        if not wait_port_open(r, p):
+            warn(f'*** iperf3 server {r.name}:{p} is not listening\n')
+    return pids
+
+def measure(net, cc_algo, n=N_FLOWS, duration=DURATION):
+    senders   = [net.get(f'h{i}') for i in range(1, n + 1)]
+    receivers = [net.get(f'h{i}') for i in range(n + 1, 2 * n + 1)]
+
+    # 모듈이 없으면 sysctl이 조용히 실패하고 이전 알고리즘이 남으므로 되읽어 확인
+    if not set_congestion_control(senders + receivers, cc_algo):
+        warn(f'*** {cc_algo} is not available on every host; skipping\n')
+        return None
+
+    ports = [5200 + i for i in range(1, n + 1)]
+    logs = [f'/tmp/runner_c{i}.json' for i in range(1, n + 1)]
+    ips = [r.IP() for r in receivers]
+    for s, ip, p, log in zip(senders, ips, ports, logs):
+        s.cmd(f'iperf3 -c {ip} -p {p} -t {duration} -i 0 -J > {log} 2>&1 &')
+
+    if not wait_json_done(logs, timeout=duration + 10):
+        warn(f'*** {cc_algo}: some iperf3 reports are incomplete\n')
+
+    tputs = []
+    for i, log in enumerate(logs, start=1):
+        try:
+            mbps, _ = parse_iperf3_json(read_log(log))
+            tputs.append(mbps)
+        except Exception as e:
+            warn(f'*** flow{i} ({cc_algo}): parse fail - {str(e)[:50]}\n')
+    return tputs
+
+def main():
+    topo = dumbbell(n=N_FLOWS, m=N_FLOWS, bw=BOTTLENECK_Mbps)
+    net  = Mininet(topo=topo, link=TCLink, autoSetMacs=True)
+    net.start()
+    server_pids = []
+    try:
+        server_pids = start_servers(net)
+        results = {}
+        for cc in CC_ALGOS:
+            info(f'*** Measuring {cc}\n')
+            results[cc] = measure(net, cc)
+    finally:
+        kill_pids(server_pids)
+        net.stop()
+
+    print(f"\n{'CC':<14} {'Util(%)':>8} {'Jain':>8} {'Avg(Mbps)':>10} {'Min~Max(Mbps)':>18}")
+    print('-' * 62)
+    for cc, tputs in results.items():
+        if tputs is None:
+            print(f'{cc:<14} (not available)')
+            continue
+        if not tputs:
+            print(f'{cc:<14} (no data)')
+            continue
+        total, avg, mn, mx, fi = summarize(tputs)
+        print(f'{cc:<14} {total / BOTTLENECK_Mbps * 100:>8.2f} {fi:>8.4f} '
+              f'{avg:>10.4f} {mn:>8.4f} ~ {mx:<8.4f}')
+
+if __name__ == '__main__':
+    setLogLevel('info')
+    main()
@@ -2,86 +2,92 @@
 # measure_correct.py - 올바른 throughput 측정
 
 from mininet.net import Mininet
-from mininet.topo import Topo
 from mininet.link import TCLink
-from mininet.node import OVSKernelSwitch
-from mininet.log import setLogLevel
-import time, json, re
+from mininet.log import setLogLevel, warn
+import re
+from subprocess import PIPE, STDOUT, TimeoutExpired
 
+from common import (CC_ALGOS, dumbbell, summarize, percentiles, parse_iperf3_json,
+                    wait_pids, wait_port_open, pin_cpu, set_congestion_control)
 
-class TestTopo(Topo):
-    def build(self):
-        senders   = [self.addHost(f'h{i}')    for i in range(1, 11)]
-        receivers = [self.addHost(f'h{i+10}') for i in range(1, 11)]
-        
-        s1 = self.addSwitch('s1', cls=OVSKernelSwitch, failMode='standalone')
-        s2 = self.addSwitch('s2', cls=OVSKernelSwitch, failMode='standalone')
-        
-        for h in senders:
-            self.addLink(h, s1, cls=TCLink, bw=10, delay='5ms')
-        
-        # 병목: 1Mbps, delay 100ms, 큐 50개
-        self.addLink(s1, s2, cls=TCLink, bw=1, delay='100ms', max_queue_size=50)
-        
-        for h in receivers:
-            self.addLink(s2, h, cls=TCLink, bw=10, delay='5ms')
+
+# ping 요약 줄 'rtt min/avg/max/mdev = a/b/c/d ms'에서 min/avg/max (출력 전체를 bytes로 한 번에 검색)
+RTT_RE = re.compile(rb'rtt min/avg/max[^=]*=\s*([\d.]+)/([\d.]+)/([\d.]+)/')
 
 
-def measure_performance(cc_algo='reno', duration=30):
-    topo = TestTopo()
+def make_net():
+    # h1~h10 -> s1 == 병목(1Mbps, delay 100ms, 큐 50개) == s2 -> h11~h20
+    topo = dumbbell(n=10, m=10, bw=1, delay='100ms', max_queue_size=50)
     net  = Mininet(topo=topo, link=TCLink, autoSetMacs=True)
     net.start()
-    
-    for i in range(1, 21):
-        h = net.get(f'h{i}')
-        h.setIP(f'10.0.0.{i}/24', intf=f'h{i}-eth0')
-    
-    for i in range(1, 21):
-        net.get(f'h{i}').cmd(f'sysctl -w net.ipv4.tcp_congestion_control={cc_algo} > /dev/null')
-    
-    # 서버
+    return net
+
+
+def measure_performance(cc_algo='reno', duration=30, net=None):
+    # net을 넘기면 그 네트워크를 재사용 (알고리즘 스윕 시 토폴로지/tc 설정을 한 번만)
+    own_net = net is None
+    if own_net:
+        net = make_net()
+    
+    # 호스트 번호(1~20)로 바로 인덱싱하는 노드/주소/포트/로그 경로 표 (루프마다 조회/문자열 재생성 방지)
+    hosts      = {i: net.get(f'h{i}') for i in range(1, 21)}
+    ip_of      = [None] + [f'10.0.0.{i}' for i in range(1, 21)]
+    port_of    = [None] * 11 + [5000 + i for i in range(11, 21)]   # 수신자 h11~h20
+    server_log = [None] * 11 + [f'/tmp/s{i}.log' for i in range(11, 21)]
+    
+    # CC 설정을 20개 호스트에 동시에 (IP는 토폴로지가 net.start() 때 이미 부여)
+    # 모듈이 없으면(reno_custom 등) sysctl이 조용히 실패하고 이전 알고리즘이 남으므로 되읽어 확인
+    if not set_congestion_control(hosts.values(), cc_algo):
+        warn(f'*** {cc_algo} is not available on every host; skipping\n')
+        if own_net:
+            net.stop()
+        return None
+    
+    # 백그라운드 프로세스는 셸 프롬프트 왕복 없이 popen으로 바로 실행
+    # 서버 (-1: 한 번만)
+    servers = []
     for i in range(11, 21):
-        port = 5000 + i
-        net.get(f'h{i}').cmd(f'iperf3 -s -p {port} -1 > /tmp/s{i}.log 2>&1 &')  # -1: 한 번만
+        with open(server_log[i], 'wb') as f:
+            servers.append(hosts[i].popen(['iperf3', '-s', '-p', str(port_of[i]), '-1'],
+                                          stdout=f, stderr=STDOUT))
+        pin_cpu(servers[-1], i - 1)   # 호스트마다 다른 코어 (mnexec가 exec하므로 pid = iperf3)
     
-    time.sleep(3)
+    # 고정 sleep 대신 각 서버 포트가 LISTEN 상태가 되는 즉시 클라이언트 시작
+    for i in range(11, 21):
+        if not wait_port_open(hosts[i], port_of[i]):
+            warn(f'*** iperf3 server h{i}:{port_of[i]} is not listening\n')
     
-    # 클라이언트 동시 실행
-    logs = []
-    for i in range(1, 11):
-        dst  = f'10.0.0.{i+10}'
-        port = 5000 + i + 10
-        log  = f'/tmp/c{i}.json'
-        logs.append((i, log))
-        net.get(f'h{i}').cmd(f'iperf3 -c {dst} -p {port} -t {duration} -J > {log} 2>&1 &')
-    
-    # RTT 측정
-    rtt_logs = []
+    # 클라이언트 동시 실행 (h{i} -> h{i+10})
+    # -J 보고서(수 KB, -i 0)는 파이프 버퍼에 들어가므로 파일 없이 stdout으로 바로 받음
+    clients = []
     for i in range(1, 11):
-        dst = f'10.0.0.{i+10}'
-        log = f'/tmp/ping{i}.txt'
-        rtt_logs.append((i, log))
-        net.get(f'h{i}').cmd(f'ping -c 20 -i 1.5 {dst} > {log} 2>&1 &')
+        clients.append(hosts[i].popen(['iperf3', '-c', ip_of[i+10], '-p', str(port_of[i+10]),
+                                       '-t', str(duration), '-i', '0', '-J'],
+                                      stdout=PIPE, stderr=STDOUT))
+        pin_cpu(clients[-1], i - 1)
     
-    time.sleep(duration + 5)
+    # RTT 측정: 모든 플로우가 같은 병목을 지나므로 ping 하나(h1 -> h11)로 충분
+    # (플로우마다 ping을 돌리면 1Mbps 병목에 ICMP 교차 트래픽만 늘어남)
+    ping = hosts[1].popen(['ping', '-c', '20', '-i', '1.5', '-q', ip_of[11]],
+                          stdout=PIPE, stderr=STDOUT)
+    procs = clients + [ping]
+    
+    # 고정 sleep 대신 iperf3/ping이 모두 끝나는 즉시 수집 단계로
+    if not wait_pids(procs, timeout=duration + 10):
+        warn('*** some iperf3/ping processes are still running; collecting anyway\n')
     
     # Throughput 수집
     throughputs = []
     retransmits = []
     
-    for i, log in logs:
-        out = net.get(f'h{i}').cmd(f'cat {log}')
+    # 클라이언트 stdout 파이프에서 보고서를 바로 읽어 파싱 (로그 파일 쓰기/읽기 없음)
+    for i, p in enumerate(clients, start=1):
         try:
-            data = json.loads(out)
-            
+            raw, _ = p.communicate(timeout=1)
             # ★ 핵심: receiver 통계 우선, 없으면 sender
-            if 'sum_received' in data['end'] and data['end']['sum_received']['bits_per_second'] > 0:
-                bw_mbps = data['end']['sum_received']['bits_per_second'] / 1e6
-            else:
-                bw_mbps = data['end']['sum_sent']['bits_per_second'] / 1e6
+            bw_mbps, retrans = parse_iperf3_json(raw)
             
             throughputs.append(bw_mbps)
-            retrans = data['end']['sum_sent'].get('retransmits', 0)
             retransmits.append(retrans)
             
             print(f"h{i}: {bw_mbps:.4f} Mbps (retrans: {retrans})")
@@ -89,45 +95,39 @@ def measure_performance(cc_algo='reno', duration=30):
         except Exception as e:
             print(f"h{i}: 파싱 실패 - {str(e)[:50]}")
     
-    # RTT 수집
-    rtts = []
-    for i, log in rtt_logs:
-        out = net.get(f'h{i}').cmd(f'cat {log}')
-        for line in out.splitlines():
-            if 'rtt min/avg/max' in line:
-                try:
-                    parts = line.split('=')[1].split('/')
-                    avg_rtt = float(parts[1].strip().split()[0])
-                    rtts.append(avg_rtt)
-                except:
-                    pass
-                break
-    
-    net.stop()
+    # RTT 수집 (-q 출력은 요약 몇 줄뿐)
+    try:
+        rtt = RTT_RE.search(ping.communicate(timeout=1)[0])
+    except TimeoutExpired:
+        rtt = None
+    
+    # 연결에 실패한 서버(-1)와 제한 시간 안에 끝나지 않은 클라이언트/ping 정리
+    for p in servers + procs:
+        if p.poll() is None:
+            p.terminate()
+            p.wait()
+    if own_net:
+        net.stop()
     
     # 메트릭
     result = {'cc': cc_algo}
     
     if throughputs:
-        total = sum(throughputs)
+        # 합계/평균/최소/최대/Jain 지수를 한 배열에서 한 번에 계산
+        total, avg, mn, mx, fi = summarize(throughputs)
         result['utilization'] = (total / 1.0) * 100  # 1Mbps 기준
-        
-        n = len(throughputs)
-        s = sum(throughputs)
-        sq = sum(x*x for x in throughputs)
-        result['fairness'] = (s*s) / (n*sq) if sq > 0 else 0
+        result['fairness'] = fi
         
         result['throughputs'] = throughputs
         result['retransmits'] = retransmits
         result['total_retrans'] = sum(retransmits)
-        result['min_tput'] = min(throughputs)
-        result['max_tput'] = max(throughputs)
-        result['avg_tput'] = total / n
+        result['min_tput'] = mn
+        result['max_tput'] = mx
+        result['avg_tput'] = avg
+        result['p5_tput'], result['p95_tput'] = percentiles(throughputs)
     
-    if rtts:
-        result['rtt_avg'] = sum(rtts) / len(rtts)
-        result['rtt_min'] = min(rtts)
-        result['rtt_max'] = max(rtts)
+    if rtt:
+        result['rtt_min'], result['rtt_avg'], result['rtt_max'] = map(float, rtt.groups())
     
     return result
 
@@ -135,29 +135,38 @@ def measure_performance(cc_algo='reno', duration=30):
 if __name__ == '__main__':
     setLogLevel('info')
     
-    print("\n" + "="*60)
-    print("TCP Reno Baseline 측정 (10 flows, 1Mbps bottleneck)")
-    print("="*60 + "\n")
-    
-    result = measure_performance(cc_algo='reno', duration=30)
-    
-    print(f"\n{'='*60}")
-    print(f"[측정 결과]")
-    print(f"{'='*60}")
-    print(f"Congestion Control:      {result.get('cc')}")
-    print(f"Link Utilization:        {result.get('utilization', 0):.2f}%")
-    print(f"Fairness Index (Jain):   {result.get('fairness', 0):.4f}")
-    print(f"")
-    print(f"Throughput 통계:")
-    print(f"  평균:                  {result.get('avg_tput', 0):.4f} Mbps")
-    print(f"  최소 ~ 최대:           {result.get('min_tput', 0):.4f} ~ {result.get('max_tput', 0):.4f} Mbps")
-    print(f"  비율 (최대/최소):      {result.get('max_tput', 1) / max(result.get('min_tput', 1), 0.001):.2f}x")
-    print(f"")
-    print(f"RTT 통계:")
-    print(f"  평균:                  {result.get('rtt_avg', 0):.1f} ms")
-    print(f"  최소 ~ 최대:           {result.get('rtt_min', 0):.1f} ~ {result.get('rtt_max', 0):.1f} ms")
-    print(f"")
-    print(f"재전송:")
-    print(f"  총 재전송 횟수:        {result.get('total_retrans', 0)}")
-    print(f"  플로우당 평균:         {result.get('total_retrans', 0) / len(result.get('throughputs', [1])):.1f}")
-    print(f"{'='*60}\n")
+    # 네트워크는 한 번만 만들고 알고리즘마다 sysctl + iperf3 단계만 반복
+    net = make_net()
+    try:
+        for cc in CC_ALGOS:
+            print("\n" + "="*60)
+            print(f"TCP {cc} 측정 (10 flows, 1Mbps bottleneck)")
+            print("="*60 + "\n")
+            
+            result = measure_performance(cc_algo=cc, duration=30, net=net)
+            if result is None:
+                continue
+            
+            print(f"\n{'='*60}")
+            print(f"[측정 결과]")
+            print(f"{'='*60}")
+            print(f"Congestion Control:      {result.get('cc')}")
+            print(f"Link Utilization:        {result.get('utilization', 0):.2f}%")
+            print(f"Fairness Index (Jain):   {result.get('fairness', 0):.4f}")
+            print(f"")
+            print(f"Throughput 통계:")
+            print(f"  평균:                  {result.get('avg_tput', 0):.4f} Mbps")
+            print(f"  최소 ~ 최대:           {result.get('min_tput', 0):.4f} ~ {result.get('max_tput', 0):.4f} Mbps")
+            print(f"  비율 (최대/최소):      {result.get('max_tput', 1) / max(result.get('min_tput', 1), 0.001):.2f}x")
+            print(f"  p5 ~ p95:              {result.get('p5_tput', 0):.4f} ~ {result.get('p95_tput', 0):.4f} Mbps")
+            print(f"")
+            print(f"RTT 통계:")
+            print(f"  평균:                  {result.get('rtt_avg', 0):.1f} ms")
+            print(f"  최소 ~ 최대:           {result.get('rtt_min', 0):.1f} ~ {result.get('rtt_max', 0):.1f} ms")
+            print(f"")
+            print(f"재전송:")
+            print(f"  총 재전송 횟수:        {result.get('total_retrans', 0)}")
+            print(f"  플로우당 평균:         {result.get('total_retrans', 0) / len(result.get('throughputs', [1])):.1f}")
+            print(f"{'='*60}\n")
+    finally:
+        net.stop()